@@ -1,12 +1,16 @@
 """Chat API routes for RAG chatbot."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
+import orjson
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.core.logging import get_logger
+from app.services.batcher import chat_batcher
 from app.services.rag_service import rag_service
+from app.services.semantic_cache import semantic_cache
 
 logger = get_logger(__name__)
 
@@ -15,6 +19,8 @@ router = APIRouter(prefix="/v1/chat", tags=["chat"])
 
 class ChatMessage(BaseModel):
     """Chat message model."""
+    model_config = ConfigDict(frozen=True)
+
     role: str = Field(..., description="Message role: user, assistant, or system")
     content: str = Field(..., description="Message content")
     timestamp: Optional[str] = Field(default=None, description="Message timestamp")
@@ -22,6 +28,8 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     """Chat request model."""
+    model_config = ConfigDict(frozen=True)
+
     message: str = Field(..., description="User message", max_length=2000)
     context_limit: int = Field(default=5, description="Number of context documents to retrieve", ge=1, le=10)
     temperature: float = Field(default=0.1, description="LLM temperature", ge=0.0, le=2.0)
@@ -30,8 +38,10 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     """Chat response model."""
+    model_config = ConfigDict(frozen=True)
+
     answer: str = Field(..., description="Assistant's response")
-    sources: List[Dict[str, Any]] = Field(default_factory=list, description="Source documents used")
+    sources: Tuple[Dict[str, Any], ...] = Field(default=(), description="Source documents used")
     confidence: float = Field(..., description="Confidence score (0-1)")
     context_used: int = Field(..., description="Number of context documents used")
     conversation_id: Optional[str] = Field(default=None, description="Conversation ID")
@@ -39,11 +49,15 @@ class ChatResponse(BaseModel):
 
 class DocumentAddRequest(BaseModel):
     """Request to add document to RAG system."""
+    model_config = ConfigDict(frozen=True)
+
     upload_id: str = Field(..., description="Upload ID of the document to add")
 
 
 class DocumentAddResponse(BaseModel):
     """Response after adding document."""
+    model_config = ConfigDict(frozen=True)
+
     success: bool = Field(..., description="Whether the operation was successful")
     upload_id: str = Field(..., description="Upload ID")
     chunks_added: int = Field(..., description="Number of chunks added")
@@ -52,27 +66,38 @@ class DocumentAddResponse(BaseModel):
 
 class DocumentStatsResponse(BaseModel):
     """Document statistics response."""
+    model_config = ConfigDict(frozen=True)
+
     total_documents: int = Field(..., description="Total number of documents")
     total_chunks: int = Field(..., description="Total number of chunks")
     collection_info: Dict[str, Any] = Field(..., description="Collection information")
 
 
 @router.post("/message", response_model=ChatResponse)
-async def chat_message(request: ChatRequest) -> ChatResponse:
-    """Send a message to the chatbot and get a response."""
+async def chat_message(request: ChatRequest) -> ORJSONResponse:
+    """Send a message to the chatbot and get a response.
+    
+    ChatResponse documents the schema; the response is returned directly so
+    FastAPI does not validate and serialize it a second time.
+    """
     try:
         logger.info("chat_message_request", message_length=len(request.message))
         
-        # Get answer from RAG service
-        result = await rag_service.answer_question(
-            question=request.message,
-            context_limit=request.context_limit,
-            temperature=request.temperature
-        )
-        
-        response = ChatResponse(
+        # Serve repeated questions from the answer cache
+        result = semantic_cache.get(request.message, request.context_limit, request.temperature)
+        cache_hit = result is not None
+
+        if result is None:
+            # Get answer from RAG service
+            result = await chat_batcher.submit(
+                request.message, request.context_limit, request.temperature
+            )
+            semantic_cache.put(request.message, request.context_limit, request.temperature, result)
+
+        # The RAG service already produces well-typed values; skip re-validation
+        response = ChatResponse.model_construct(
             answer=result["answer"],
-            sources=result.get("sources", []),
+            sources=tuple(result.get("sources", ())),
             confidence=result.get("confidence", 0.0),
             context_used=result.get("context_used", 0),
             conversation_id=request.conversation_id
@@ -82,16 +107,38 @@ async def chat_message(request: ChatRequest) -> ChatResponse:
             "chat_message_response",
             answer_length=len(response.answer),
             sources_count=len(response.sources),
-            confidence=response.confidence
+            confidence=response.confidence,
+            chat_cache_hit=cache_hit
         )
         
-        return response
+        return ORJSONResponse(content=response.model_dump())
         
     except Exception as e:
         logger.error(f"Chat message error: {e}")
         raise HTTPException(status_code=500, detail="Failed to process chat message")
 
 
+@router.post("/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """Send a message to the chatbot and stream the response as Server-Sent Events."""
+    logger.info("chat_stream_request", message_length=len(request.message))
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        async for event in rag_service.answer_question_stream(
+            request.message, request.context_limit, request.temperature
+        ):
+            if event.get("done"):
+                event["conversation_id"] = request.conversation_id
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/documents/add", response_model=DocumentAddResponse)
 async def add_document(request: DocumentAddRequest) -> DocumentAddResponse:
     """Add a document to the RAG system."""
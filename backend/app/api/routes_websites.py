@@ -3,7 +3,8 @@
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, HttpUrl
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 
 from app.core.logging import get_logger
 from app.services.website_ingestion import website_ingestion_service
@@ -15,18 +16,24 @@ router = APIRouter(prefix="/v1/websites", tags=["websites"])
 
 class WebsiteIngestRequest(BaseModel):
     """Request to ingest a single website."""
+    model_config = ConfigDict(frozen=True)
+
     url: HttpUrl = Field(..., description="Website URL to ingest")
     max_pages: int = Field(default=10, description="Maximum pages to scrape", ge=1, le=50)
 
 
 class MultipleWebsitesIngestRequest(BaseModel):
     """Request to ingest multiple websites."""
+    model_config = ConfigDict(frozen=True)
+
     urls: List[HttpUrl] = Field(..., description="List of website URLs to ingest", min_items=1, max_items=10)
     max_pages_per_site: int = Field(default=10, description="Maximum pages per website", ge=1, le=50)
 
 
 class WebsiteIngestResponse(BaseModel):
     """Response after ingesting a website."""
+    model_config = ConfigDict(frozen=True)
+
     success: bool = Field(..., description="Whether the operation was successful")
     url: str = Field(..., description="Website URL")
     pages_scraped: int = Field(..., description="Total pages scraped")
@@ -38,6 +45,8 @@ class WebsiteIngestResponse(BaseModel):
 
 class MultipleWebsitesIngestResponse(BaseModel):
     """Response after ingesting multiple websites."""
+    model_config = ConfigDict(frozen=True)
+
     success: bool = Field(..., description="Whether any websites were successfully ingested")
     total_sites: int = Field(..., description="Total number of websites")
     successful_sites: int = Field(..., description="Number of successfully ingested websites")
@@ -48,6 +57,8 @@ class MultipleWebsitesIngestResponse(BaseModel):
 
 class WebsiteSource(BaseModel):
     """Website source information."""
+    model_config = ConfigDict(frozen=True)
+
     url: str = Field(..., description="Website URL")
     domain: str = Field(..., description="Website domain")
     title: str = Field(..., description="Website title")
@@ -57,13 +68,15 @@ class WebsiteSource(BaseModel):
 
 class WebsiteSourcesResponse(BaseModel):
     """Response containing website sources."""
+    model_config = ConfigDict(frozen=True)
+
     sources: List[WebsiteSource] = Field(..., description="List of website sources")
     total_sources: int = Field(..., description="Total number of website sources")
     total_chunks: int = Field(..., description="Total chunks from all websites")
 
 
 @router.post("/ingest", response_model=WebsiteIngestResponse)
-async def ingest_website(request: WebsiteIngestRequest) -> WebsiteIngestResponse:
+async def ingest_website(request: WebsiteIngestRequest) -> ORJSONResponse:
     """Ingest content from a single website."""
     try:
         logger.info(f"Website ingestion request: {request.url}")
@@ -73,7 +86,8 @@ async def ingest_website(request: WebsiteIngestRequest) -> WebsiteIngestResponse
             max_pages=request.max_pages
         )
         
-        response = WebsiteIngestResponse(
+        # Returned directly so FastAPI skips re-validating the response model
+        response = WebsiteIngestResponse.model_construct(
             success=result["success"],
             url=result["url"],
             pages_scraped=result.get("pages_scraped", 0),
@@ -88,7 +102,7 @@ async def ingest_website(request: WebsiteIngestRequest) -> WebsiteIngestResponse
         else:
             logger.warning(f"Website ingestion failed: {request.url}, {result.get('error')}")
         
-        return response
+        return ORJSONResponse(content=response.model_dump())
         
     except Exception as e:
         logger.error(f"Website ingestion error: {e}")
@@ -102,7 +116,7 @@ async def ingest_multiple_websites(request: MultipleWebsitesIngestRequest) -> Mu
         logger.info(f"Multiple websites ingestion request: {len(request.urls)} websites")
         
         result = await website_ingestion_service.ingest_multiple_websites(
-            urls=[str(url) for url in request.urls],
+            urls=request.urls,
             max_pages_per_site=request.max_pages_per_site
         )
         
@@ -1,14 +1,22 @@
 """Application configuration using Pydantic Settings."""
 
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional
 
 from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings with environment variable support."""
 
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        frozen=True,
+    )
+
     # App metadata
     app_name: str = Field(default="rag-chatbot", description="Application name")
     app_version: str = Field(default="1.0.0", description="Application version")
@@ -16,16 +24,22 @@ class Settings(BaseSettings):
     # Environment
     env: str = Field(default="dev", description="Environment: dev|prod")
     port: int = Field(default=8080, description="Server port")
+    cors_origins: List[str] = Field(default=["*"], description="Origins allowed to call the API")
 
     # Logging
     log_level: str = Field(default="INFO", description="Logging level")
     log_format: str = Field(default="json", description="Log format (json|text)")
+    log_flush_interval: float = Field(default=1.0, description="Seconds between flushes of buffered log output")
+    log_queue_size: int = Field(default=10000, description="Max queued log records before dropping (0 = unbounded)")
+    log_sample_rate: float = Field(default=0.1, ge=0.0, le=1.0, description="Fraction of requests logged by the request middleware")
+    log_slow_request_ms: float = Field(default=250.0, description="Requests slower than this are always logged")
 
     # LLM
     llm_base_url: Optional[str] = Field(default=None)
     llm_api_key: Optional[str] = Field(default=None)
     llm_api_gw_key: Optional[str] = Field(default=None)
     llm_auth_header: Optional[str] = Field(default=None)
+    llm_keep_alive: str = Field(default="30m", description="How long Ollama keeps the model and prompt cache loaded")
 
     # Storage
     gcs_bucket: Optional[str] = Field(default=None)
@@ -33,11 +47,23 @@ class Settings(BaseSettings):
     
     # Vector Database
     vector_db_path: Optional[str] = Field(default="/tmp/chroma_db", description="Path to ChromaDB storage")
+    vector_index_in_memory: bool = Field(default=False, description="Serve unfiltered searches from an in-memory Hamming index instead of ChromaDB")
     
     # Memory optimization settings
     max_batch_size: int = Field(default=8, description="Maximum batch size for embedding generation")
     embedding_device: str = Field(default="cpu", description="Device for embedding model (cpu/cuda)")
 
+    # Website ingestion
+    website_ingest_concurrency: int = Field(default=5, description="Websites crawled in parallel per ingest request")
+
+    # Chat request batching
+    chat_batch_max_size: int = Field(default=16, description="Maximum chat questions answered per batch")
+    chat_batch_max_latency_ms: float = Field(default=8.0, description="How long to wait for a batch to fill")
+
+    # Chat answer cache
+    chat_cache_size: int = Field(default=512, description="Maximum cached chat answers (0 disables the cache)")
+    chat_cache_ttl_seconds: float = Field(default=300.0, description="Seconds a cached chat answer stays valid")
+
     # Defaults
     max_children_default: int = Field(default=8)
 
@@ -51,10 +77,11 @@ class Settings(BaseSettings):
     def is_dev(self) -> bool:
         return (self.env or "dev").lower() == "dev"
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once."""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
@@ -1,39 +1,172 @@
 """Structured logging configuration, uvicorn-compatible."""
 
+import atexit
+import io
 import logging
+import logging.handlers
+import queue
 import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, TextIO
 
 import structlog
-from structlog.stdlib import LoggerFactory
+from structlog.stdlib import LoggerFactory, ProcessorFormatter
 
 from app.core.config import settings
 
+_listener: Optional[logging.handlers.QueueListener] = None
+_stream_handler: Optional[logging.StreamHandler] = None
+_queue_handler: Optional["_DropIfFullQueueHandler"] = None
+
+
+class _DropIfFullQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that defers formatting and sheds records under overload."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Rendering happens on the listener thread, so pass the record as-is
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """Stream handler that leaves flushing to flush_logging() except for errors."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+def _add_record_timestamp(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Stamp a stdlib record with the time it was logged, not the time it is rendered."""
+    created = event_dict["_record"].created
+    event_dict["timestamp"] = datetime.fromtimestamp(created, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+    return event_dict
+
+
+def _buffered_stdout() -> TextIO:
+    """Open stdout with an 8 KB write buffer, independent of PYTHONUNBUFFERED."""
+    try:
+        raw = io.FileIO(sys.stdout.fileno(), "w", closefd=False)
+    except (AttributeError, OSError, ValueError):
+        return sys.stdout
+    return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=8192), encoding="utf-8")
+
 
 def configure_logging() -> None:
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.log_level.upper(), logging.INFO),
-    )
-    processors = [
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-    ]
+    """Route all logging through a queue drained by a background thread.
+
+    Callers only pay for the structlog pre-processing and an enqueue; JSON
+    rendering and the stdout write happen on the listener thread. Output is
+    buffered and written out by flush_logging() or when an error is logged.
+    """
+    global _listener, _stream_handler, _queue_handler
+    if _listener is not None:
+        return
+
     if settings.log_format == "json":
-        processors.append(structlog.processors.JSONRenderer())
+        renderer = structlog.processors.JSONRenderer()
     else:
-        processors.append(structlog.dev.ConsoleRenderer())
+        renderer = structlog.dev.ConsoleRenderer()
+
+    stream_handler = _BufferedStreamHandler(_buffered_stdout())
+    stream_handler.setFormatter(
+        ProcessorFormatter(
+            processors=[ProcessorFormatter.remove_processors_meta, renderer],
+            foreign_pre_chain=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                # Runs on the listener thread, so use the record's own creation time
+                _add_record_timestamp,
+            ],
+        )
+    )
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.log_queue_size)
+    root = logging.getLogger()
+    queue_handler = _DropIfFullQueueHandler(log_queue)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, settings.log_level.upper(), logging.INFO))
+
+    _stream_handler = stream_handler
+    _queue_handler = queue_handler
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
     structlog.configure(
-        processors=processors,
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            ProcessorFormatter.wrap_for_formatter,
+        ],
         wrapper_class=structlog.stdlib.BoundLogger,
         logger_factory=LoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
 
+def _report_dropped() -> None:
+    """Log how many records the queue handler shed since the last report."""
+    if _queue_handler is None or _stream_handler is None or not _queue_handler.dropped:
+        return
+    dropped, _queue_handler.dropped = _queue_handler.dropped, 0
+    # Written straight to the stream: the queue may still be full
+    _stream_handler.handle(
+        logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "Dropped %d log records because the log queue was full", (dropped,), None,
+        )
+    )
+
+
+def flush_logging() -> None:
+    """Report shed records and write out buffered log output."""
+    _report_dropped()
+    if _stream_handler is not None:
+        _stream_handler.flush()
+
+
+def shutdown_logging() -> None:
+    """Stop the listener thread after it has written all queued records.
+
+    Later records go straight to the stream handler instead of a queue
+    that nobody drains any more.
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    if _stream_handler is not None:
+        root.addHandler(_stream_handler)
+    try:
+        listener.stop()
+    except queue.Full:
+        # No room for the stop sentinel; the daemon thread dies with the process
+        pass
+    flush_logging()
+
+
 def get_logger(name: str):
     return structlog.get_logger(name)
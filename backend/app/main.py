@@ -1,28 +1,45 @@
 """Main FastAPI application for RAG chatbot."""
 
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
-from app.api.middleware import LoggingMiddleware, SecurityHeadersMiddleware
+from app.api.middleware import RequestPipelineMiddleware
 from app.api.routes_chat import router as chat_router
 from app.api.routes_websites import router as websites_router
 from app.core.config import settings
-from app.core.logging import configure_logging, get_logger
+from app.core.logging import configure_logging, flush_logging, get_logger, shutdown_logging
+from app.services.batcher import chat_batcher
+from app.services.llm import close_llm_client
+from app.services.web_scraper import web_scraper
 
 
 configure_logging()
 logger = get_logger(__name__)
 
 
+async def _flush_logs_periodically() -> None:
+    """Cap how long buffered log output waits before reaching stdout."""
+    while True:
+        await asyncio.sleep(settings.log_flush_interval)
+        flush_logging()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("starting rag-chatbot", version=settings.app_version, env=settings.env)
+    log_flusher = asyncio.create_task(_flush_logs_periodically())
     yield
+    await chat_batcher.close()
+    await close_llm_client()
+    web_scraper.close()
+    log_flusher.cancel()
     logger.info("shutting down rag-chatbot")
+    shutdown_logging()
 
 
 def create_app() -> FastAPI:
@@ -34,14 +51,21 @@ def create_app() -> FastAPI:
         redoc_url=None,
         openapi_url="/openapi.json",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
-    app.add_middleware(LoggingMiddleware)
-    app.add_middleware(SecurityHeadersMiddleware)
+    # Middleware added last runs first: CORS stays outermost so preflight
+    # requests are answered before any logging work is done.
+    app.add_middleware(
+        RequestPipelineMiddleware,
+        sample_rate=settings.log_sample_rate,
+        slow_ms=settings.log_slow_request_ms,
+    )
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
+        allow_origins=settings.cors_origins,
+        # Never send credentials to arbitrary origins; list origins explicitly to allow them
+        allow_credentials="*" not in settings.cors_origins,
         allow_methods=["*"],
         allow_headers=["*"],
     )
@@ -51,8 +75,8 @@ def create_app() -> FastAPI:
     app.include_router(websites_router)
 
     @app.get("/health")
-    async def health() -> JSONResponse:
-        return JSONResponse(content={"ok": True})
+    async def health() -> ORJSONResponse:
+        return ORJSONResponse(content={"ok": True})
 
     return app
 
@@ -0,0 +1,91 @@
+"""Micro-batching of concurrent chat questions."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.rag_service import rag_service
+
+logger = get_logger(__name__)
+
+BatchItem = Tuple[Tuple[str, int, float], "asyncio.Future[Dict[str, Any]]"]
+
+
+class ChatBatcher:
+    """Groups questions that arrive close together into one RAG batch.
+
+    A batch closes when it reaches max_batch_size or max_latency_ms after its
+    first question arrived. The whole batch shares one vector database query
+    and its LLM calls run concurrently.
+    """
+
+    def __init__(self, max_batch_size: int = 16, max_latency_ms: float = 8.0):
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self._queue: Optional["asyncio.Queue[BatchItem]"] = None
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._batches: Set["asyncio.Task[None]"] = set()
+
+    async def submit(self, question: str, context_limit: int, temperature: float) -> Dict[str, Any]:
+        """Queue a question and wait for its answer."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._collect())
+
+        future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(((question, context_limit, temperature), future))
+        return await future
+
+    async def _collect(self) -> None:
+        """Pull questions off the queue and dispatch them in batches."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[BatchItem] = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Answer in the background so the next batch can start filling
+            task = asyncio.create_task(self._answer(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _answer(self, batch: List[BatchItem]) -> None:
+        """Answer one batch and resolve its futures."""
+        try:
+            results = await rag_service.answer_questions_batch([item for item, _ in batch])
+        except Exception as e:
+            logger.error(f"Chat batch failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.info("chat_batch_answered", batch_size=len(batch))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Stop the collector and wait for in-flight batches."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+
+# Global chat batcher instance
+chat_batcher = ChatBatcher(
+    max_batch_size=settings.chat_batch_max_size,
+    max_latency_ms=settings.chat_batch_max_latency_ms,
+)
@@ -1,11 +1,13 @@
 """LLM adapter with deterministic dev mock."""
 
-import json
-import random
+import asyncio
+import re
 import time
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
+import orjson
 from fastapi import HTTPException
 
 from app.core.config import settings
@@ -13,6 +15,9 @@ from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Bullet lines ("- label") in prompt content seed the dev mock
+_SEED_RE = re.compile(r"^- (.*)$", re.MULTILINE)
+
 
 def _parse_json_object_from_content(content: str) -> Dict[str, Any]:
     """Parse JSON from LLM content, handling markdown fences and malformed JSON."""
@@ -30,8 +35,8 @@ def _parse_json_object_from_content(content: str) -> Dict[str, Any]:
     
     # Try direct JSON parse first
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         pass
     
     # Fallback: find first balanced JSON object
@@ -39,37 +44,46 @@ def _parse_json_object_from_content(content: str) -> Dict[str, Any]:
     if start == -1:
         return {"nodes": []}
     
+    # Jump between braces with str.find instead of stepping through every character
     depth = 0
-    for i in range(start, len(text)):
-        ch = text[i]
-        if ch == '{':
+    open_pos = start
+    close_pos = text.find("}", start)
+    while close_pos != -1:
+        if open_pos != -1 and open_pos < close_pos:
             depth += 1
-        elif ch == '}':
-            depth -= 1
-            if depth == 0:
-                try:
-                    return json.loads(text[start : i + 1])
-                except json.JSONDecodeError:
-                    pass
+            open_pos = text.find("{", open_pos + 1)
+            continue
+        depth -= 1
+        if depth == 0:
+            try:
+                return orjson.loads(text[start : close_pos + 1])
+            except orjson.JSONDecodeError:
+                pass
+        close_pos = text.find("}", close_pos + 1)
     
     return {"nodes": []}
 
 
 def _convert_hierarchical_to_flat(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Convert LLM's hierarchical format to flat nodes array."""
-    flat_nodes = []
+    flat_nodes: List[Dict[str, Any]] = []
+    append = flat_nodes.append
     
-    def extract_node(node_data: Dict[str, Any], parent_temp_id: Optional[str] = None, depth: int = 1) -> None:
+    # Depth-first with an explicit stack so deep trees can't hit the recursion limit
+    stack: List[Tuple[Dict[str, Any], Optional[str], int]] = [(data, None, 1)]
+    while stack:
+        node_data, parent_temp_id, depth = stack.pop()
+        
         # Extract node info
         label = node_data.get("name", node_data.get("label", ""))
         if not label:
-            return
+            continue
             
         temp_id = f"n{len(flat_nodes) + 1}"
         evidence_ids = node_data.get("evidence_ids", [])
         
         # Add to flat list
-        flat_nodes.append({
+        append({
             "temp_id": temp_id,
             "label": label,
             "parent_temp_id": parent_temp_id,
@@ -77,57 +91,46 @@ def _convert_hierarchical_to_flat(data: Dict[str, Any]) -> List[Dict[str, Any]]:
             "evidence_ids": evidence_ids
         })
         
-        # Process children recursively
+        # Push children reversed so they are visited in their original order
         children = node_data.get("children", [])
-        for child in children:
-            extract_node(child, temp_id, depth + 1)
+        stack.extend((child, temp_id, depth + 1) for child in reversed(children))
     
-    # Start conversion
-    extract_node(data)
     return flat_nodes
 
 
-async def call_llm(
-    messages: List[Dict[str, str]],
-    response_format: Optional[Dict[str, Any]] = None,
-    temperature: float = 0.2,
-) -> Dict[str, Any]:
-    """Call configured LLM endpoint or return mock in dev when not configured."""
+_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
 
-    if not settings.llm_base_url:
-        # Return a mocked response envelope with nodes derived from input
-        # Extract any topical seeds from messages for determinism
-        seed_labels: List[str] = []
-        for m in messages:
-            content = (m.get("content") or "").lower()
-            for line in content.splitlines():
-                if line.startswith("- "):
-                    seed_labels.append(line[2:].strip())
-        if not seed_labels:
-            seed_labels = ["Root Topic"]
+# Shared across calls so connections to the LLM server are kept alive
+_client: Optional[httpx.AsyncClient] = None
 
-        # Build a tiny tree up to depth 3 deterministically
-        random.seed(42)
-        nodes: List[Dict[str, Any]] = []
-        for i, root in enumerate(seed_labels[:3], start=1):
-            root_id = f"r{i}"
-            nodes.append({"temp_id": root_id, "label": root, "parent_temp_id": None, "depth": 1})
-            # two children each
-            for c in range(2):
-                child_label = f"{root} Child {c+1}"
-                cid = f"{root_id}-c{c+1}"
-                nodes.append({"temp_id": cid, "label": child_label, "parent_temp_id": root_id, "depth": 2})
-                # grandchild
-                gc_label = f"{child_label} Subtopic"
-                gid = f"{cid}-g1"
-                nodes.append({"temp_id": gid, "label": gc_label, "parent_temp_id": cid, "depth": 3})
-        return {"nodes": nodes}
-
-    # Local Ollama API call
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared LLM HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            # Sane timeouts; pool=None waits for a free connection
+            timeout=httpx.Timeout(connect=30, read=90, write=30, pool=None),
+            limits=httpx.Limits(max_keepalive_connections=16),
+        )
+    return _client
+
+
+async def close_llm_client() -> None:
+    """Close the shared LLM HTTP client."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def _ollama_url() -> str:
+    """Return the Ollama generate endpoint."""
+    return f"{settings.llm_base_url.rstrip('/')}/api/generate" if settings.llm_base_url else "http://localhost:11434/api/generate"
+
+
+def _build_ollama_payload(messages: List[Dict[str, str]], temperature: float) -> Dict[str, Any]:
+    """Convert chat messages into a streaming Ollama generate payload."""
     # Convert messages to prompt format for Ollama
     prompt_parts = []
     for message in messages:
@@ -142,77 +145,145 @@ async def call_llm(
     
     prompt = "\n\n".join(prompt_parts) + "\n\nAssistant:"
     
-    # Build payload for Ollama API
-    payload: Dict[str, Any] = {
+    return {
         "model": "llama3.2:3b",
         "prompt": prompt,
-        "stream": False,
+        "stream": True,
+        # Keep the model and its prompt KV cache resident between requests
+        "keep_alive": settings.llm_keep_alive,
         "options": {
             "temperature": settings.llm_default_temperature if settings.llm_default_temperature is not None else temperature,
             "num_predict": settings.llm_default_max_tokens if settings.llm_default_max_tokens is not None else 2000
         }
     }
 
+
+def _mock_tree_for(index: int, root: str) -> List[Dict[str, Any]]:
+    """Build the dev mock subtree for one seed: the root, two children and a grandchild each."""
+    r = f"r{index}"
+    return [
+        {"temp_id": r, "label": root, "parent_temp_id": None, "depth": 1},
+        {"temp_id": f"{r}-c1", "label": f"{root} Child 1", "parent_temp_id": r, "depth": 2},
+        {"temp_id": f"{r}-c1-g1", "label": f"{root} Child 1 Subtopic", "parent_temp_id": f"{r}-c1", "depth": 3},
+        {"temp_id": f"{r}-c2", "label": f"{root} Child 2", "parent_temp_id": r, "depth": 2},
+        {"temp_id": f"{r}-c2-g1", "label": f"{root} Child 2 Subtopic", "parent_temp_id": f"{r}-c2", "depth": 3},
+    ]
+
+
+@lru_cache(maxsize=256)
+def _build_mock_tree(seeds: Tuple[str, ...]) -> Tuple[Dict[str, Any], ...]:
+    """Build the dev mock tree for up to three seeds; cached since it is deterministic."""
+    return tuple(
+        node
+        for i, root in enumerate(seeds, start=1)
+        for node in _mock_tree_for(i, root)
+    )
+
+
+async def call_llm(
+    messages: List[Dict[str, str]],
+    response_format: Optional[Dict[str, Any]] = None,
+    temperature: float = 0.2,
+) -> Dict[str, Any]:
+    """Call configured LLM endpoint or return mock in dev when not configured."""
+
+    if not settings.llm_base_url:
+        # Return a mocked response envelope with nodes derived from input
+        # Extract any topical seeds from messages for determinism
+        seed_labels: List[str] = []
+        for m in messages:
+            content = m.get("content") or ""
+            seed_labels.extend(label.strip().lower() for label in _SEED_RE.findall(content))
+        if not seed_labels:
+            seed_labels = ["Root Topic"]
+
+        # Build a tiny tree up to depth 3 deterministically
+        # Copy the cached nodes so callers cannot alter later mock responses
+        return {"nodes": [dict(node) for node in _build_mock_tree(tuple(seed_labels[:3]))]}
+
+    # Stream the completion from Ollama and assemble it as it arrives
+    content = "".join([delta async for delta in stream_llm(messages, temperature=temperature)])
+
+    # Check if content is empty
+    if not content.strip():
+        logger.error("LLM returned empty content", 
+                    url=_ollama_url(), 
+                    has_response_format=response_format is not None)
+        return {"content": "I don't have enough information to answer your question."}
+    
+    # For RAG chatbot, return the content directly
+    return {"content": content}
+
+
+async def stream_llm(
+    messages: List[Dict[str, str]],
+    temperature: float = 0.2,
+) -> AsyncIterator[str]:
+    """Stream generated text from the configured LLM as it is produced.
+
+    Yields nothing in dev when no LLM is configured. Transient 429/5xx
+    responses are retried once; other failures raise a 502.
+    """
+    if not settings.llm_base_url:
+        return
+
+    url = _ollama_url()
+    payload = _build_ollama_payload(messages, temperature)
+
     # Debug logging for request
-    ollama_url = f"{settings.llm_base_url.rstrip('/')}/api/generate" if settings.llm_base_url else "http://localhost:11434/api/generate"
     logger.info("LLM gateway request", 
-                url=ollama_url,
+                url=url,
                 model=payload.get("model"),
                 message_count=len(messages),
-                has_response_format=response_format is not None,
                 max_tokens=payload.get("options", {}).get("num_predict"),
                 system_msg_length=len(messages[0]["content"]) if messages else 0,
                 user_msg_length=len(messages[1]["content"]) if len(messages) > 1 else 0)
 
-    # Set sane timeouts and a single retry for transient 429/5xx
-    timeout = httpx.Timeout(connect=30, read=90, write=30, pool=None)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        # Use configured Ollama endpoint
-        url = f"{settings.llm_base_url.rstrip('/')}/api/generate" if settings.llm_base_url else "http://localhost:11434/api/generate"
-        try:
-            resp = await client.post(url, json=payload, headers=headers)
-            if resp.status_code in (429, 500, 502, 503, 504):
-                import asyncio as _asyncio
-                await _asyncio.sleep(0.5)
-                resp = await client.post(url, json=payload, headers=headers)
-            if resp.status_code not in (200, 201):  # Accept both 200 and 201
-                logger.error(
-                    "LLM gateway error",
-                    status_code=resp.status_code,
-                    url=url,
-                    model=payload.get("model"),
-                    body_preview=resp.text[:500],
-                )
-                raise HTTPException(status_code=502, detail=f"LLM gateway error {resp.status_code}")
-        except HTTPException:
-            raise
-        except Exception as exc:
-            logger.error("LLM request failed", error=str(exc), url=url)
-            # When an explicit gateway is configured, surface the failure (no silent fallback)
-            raise HTTPException(status_code=502, detail="LLM request failed")
-
-        raw_response_json = resp.json()
-        
-        # Ollama API response format
-        try:
-            content = raw_response_json.get("response", "")
-                
-            # Check if content is empty
-            if not content or content.strip() == "":
-                logger.error("LLM returned empty content", 
-                            url=url, 
+    client = _get_client()
+    try:
+        for attempt in range(2):
+            async with client.stream("POST", url, json=payload) as resp:
+                # Single retry for transient 429/5xx, before anything was streamed
+                if resp.status_code in _RETRY_STATUS_CODES and attempt == 0:
+                    await asyncio.sleep(0.5)
+                    continue
+                if resp.status_code not in (200, 201):
+                    body = await resp.aread()
+                    logger.error(
+                        "LLM gateway error",
+                        status_code=resp.status_code,
+                        url=url,
+                        model=payload.get("model"),
+                        body_preview=body[:500].decode("utf-8", errors="replace"),
+                    )
+                    raise HTTPException(status_code=502, detail=f"LLM gateway error {resp.status_code}")
+
+                # Ollama streams one JSON object per line
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    # Failures during generation arrive as an error line in a 200 response
+                    if chunk.get("error"):
+                        logger.error(
+                            "LLM gateway error",
+                            status_code=resp.status_code,
+                            url=url,
                             model=payload.get("model"),
-                            data_preview=json.dumps(raw_response_json)[:800])
-                return {"content": "I don't have enough information to answer your question."}
-                
-        except (KeyError, TypeError) as exc:
-            logger.error("LLM response parse error: missing response", 
-                        error=str(exc), url=url, 
-                        data_preview=json.dumps(raw_response_json)[:800])
-            return {"content": "I encountered an error processing your request."}
-        
-        # For RAG chatbot, return the content directly
-        return {"content": content}
+                            body_preview=str(chunk["error"])[:500],
+                        )
+                        raise HTTPException(status_code=502, detail="LLM gateway error")
+                    delta = chunk.get("response", "")
+                    if delta:
+                        yield delta
+                    if chunk.get("done"):
+                        break
+                return
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.error("LLM request failed", error=str(exc), url=url)
+        raise HTTPException(status_code=502, detail="LLM request failed")
 
 
 async def llm_propose(req, shown_snippets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
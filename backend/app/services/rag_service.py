@@ -1,23 +1,39 @@
 """RAG (Retrieval-Augmented Generation) service for chatbot."""
 
+import asyncio
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from app.core.logging import get_logger
-from app.services.llm import call_llm
-from app.services.vector_db import vector_db
+from app.services.llm import call_llm, stream_llm
+from app.services.vector_db import VectorDB, get_vector_db
 
 logger = get_logger(__name__)
 
+# Last '.', '!' or '?' before the end of the searched range
+_LAST_SENTENCE_END_RE = re.compile(r"[.!?][^.!?]*$")
+
+NO_CONTEXT_ANSWER = "I don't have any relevant information to answer your question. Please upload some documents first."
+
+# Kept byte-identical across requests and always sent first, so the LLM
+# server can reuse the KV cache it already holds for this prompt prefix.
+SYSTEM_PROMPT = """You are a helpful assistant that answers questions based on the provided context. 
+            Use only the information from the context to answer the question. If the context doesn't contain 
+            enough information to answer the question, say so clearly. Be concise but comprehensive."""
+
 
 class RAGService:
     """RAG service for document processing and question answering."""
     
     def __init__(self):
-        self.vector_db = vector_db
         self.max_chunk_size = 1000
         self.chunk_overlap = 200
     
+    @property
+    def vector_db(self) -> VectorDB:
+        """Vector database, opened on first use rather than at import time."""
+        return get_vector_db()
+    
     # Document upload functionality removed - using website ingestion only
     
     async def answer_question(
@@ -28,80 +44,177 @@ class RAGService:
     ) -> Dict[str, Any]:
         """Answer a question using RAG."""
         try:
-            # Retrieve relevant documents
-            retrieved_docs = self.vector_db.search(
+            # Retrieve relevant documents off the event loop
+            retrieved_docs = await asyncio.to_thread(
+                self.vector_db.search,
                 query=question,
                 n_results=context_limit
             )
-            
+        except Exception as e:
+            logger.error(f"Failed to answer question: {e}")
+            return self._error_answer(e)
+        
+        return await self._answer_from_documents(question, retrieved_docs, temperature)
+    
+    async def answer_questions_batch(
+        self,
+        questions: List[Tuple[str, int, float]]
+    ) -> List[Dict[str, Any]]:
+        """Answer several (question, context_limit, temperature) requests at once.
+        
+        Retrieval for the whole batch is a single vector database query; the
+        LLM calls are then issued concurrently.
+        """
+        try:
+            n_results = max(context_limit for _, context_limit, _ in questions)
+            batch_docs = await asyncio.to_thread(
+                self.vector_db.search_many,
+                queries=[question for question, _, _ in questions],
+                n_results=n_results
+            )
+        except Exception as e:
+            logger.error(f"Failed to answer question batch: {e}")
+            return [self._error_answer(e) for _ in questions]
+        
+        # Results are ordered by distance, so each request keeps its own top-k
+        return list(await asyncio.gather(*(
+            self._answer_from_documents(question, docs[:context_limit], temperature)
+            for (question, context_limit, temperature), docs in zip(questions, batch_docs)
+        )))
+    
+    async def _answer_from_documents(
+        self,
+        question: str,
+        retrieved_docs: List[Dict[str, Any]],
+        temperature: float
+    ) -> Dict[str, Any]:
+        """Generate an answer from already retrieved documents."""
+        try:
             if not retrieved_docs:
                 return {
-                    "answer": "I don't have any relevant information to answer your question. Please upload some documents first.",
+                    "answer": NO_CONTEXT_ANSWER,
                     "sources": [],
                     "confidence": 0.0
                 }
             
-            # Prepare context
-            context_parts = []
-            sources = []
-            
-            for doc in retrieved_docs:
-                context_parts.append(doc['document'])
-                if doc['metadata']:
-                    sources.append({
-                        "upload_id": doc['metadata'].get('upload_id', 'unknown'),
-                        "chunk_index": doc['metadata'].get('chunk_index', 0),
-                        "relevance_score": 1.0 - doc['distance']  # Convert distance to similarity
-                    })
-            
-            context = "\n\n".join(context_parts)
-            
-            # Generate answer using LLM
-            system_prompt = """You are a helpful assistant that answers questions based on the provided context. 
-            Use only the information from the context to answer the question. If the context doesn't contain 
-            enough information to answer the question, say so clearly. Be concise but comprehensive."""
-            
-            user_prompt = f"""Context:
-{context}
-
-Question: {question}
-
-Please provide a helpful answer based on the context above."""
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
+            messages, sources, avg_relevance = self._build_messages(question, retrieved_docs)
             
             # Call LLM
             response = await call_llm(messages, temperature=temperature)
             answer = response.get("content", "I couldn't generate an answer.") if isinstance(response, dict) else str(response)
             
-            # Calculate confidence based on source relevance
-            avg_relevance = sum(s['relevance_score'] for s in sources) / len(sources) if sources else 0.0
-            
             logger.info(f"Answered question with {len(sources)} sources, avg relevance: {avg_relevance:.2f}")
             
             return {
                 "answer": answer,
                 "sources": sources,
                 "confidence": avg_relevance,
-                "context_used": len(context_parts)
+                "context_used": len(retrieved_docs)
             }
             
         except Exception as e:
             logger.error(f"Failed to answer question: {e}")
-            return {
-                "answer": "I encountered an error while processing your question. Please try again.",
-                "sources": [],
-                "confidence": 0.0,
-                "error": str(e)
+            return self._error_answer(e)
+    
+    async def answer_question_stream(
+        self,
+        question: str,
+        context_limit: int = 5,
+        temperature: float = 0.1
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer a question using RAG, yielding the answer as it is generated.
+        
+        Yields {"delta": text} events followed by a final event carrying
+        "done", the sources and the confidence, or a single "error" event.
+        """
+        try:
+            retrieved_docs = await asyncio.to_thread(
+                self.vector_db.search,
+                query=question,
+                n_results=context_limit
+            )
+            if not retrieved_docs:
+                yield {"delta": NO_CONTEXT_ANSWER}
+                yield {"done": True, "sources": [], "confidence": 0.0, "context_used": 0}
+                return
+            
+            messages, sources, avg_relevance = self._build_messages(question, retrieved_docs)
+            
+            produced = False
+            async for delta in stream_llm(messages, temperature=temperature):
+                produced = True
+                yield {"delta": delta}
+            if not produced:
+                yield {"delta": "I couldn't generate an answer."}
+            
+            logger.info(f"Streamed answer with {len(sources)} sources, avg relevance: {avg_relevance:.2f}")
+            
+            yield {
+                "done": True,
+                "sources": sources,
+                "confidence": avg_relevance,
+                "context_used": len(retrieved_docs)
             }
+            
+        except Exception as e:
+            logger.error(f"Failed to stream answer: {e}")
+            yield {"error": self._error_answer(e)["answer"]}
+    
+    @staticmethod
+    def _build_messages(
+        question: str,
+        retrieved_docs: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]], float]:
+        """Build the LLM messages, source list and average source relevance for retrieved documents."""
+        # Prepare context and sources in a single pass
+        context_parts = []
+        sources: List[Dict[str, Any]] = []
+        add_source = sources.append
+        relevance_sum = 0.0
+        
+        for doc in retrieved_docs:
+            context_parts.append(doc['document'])
+            if doc['metadata']:
+                relevance = 1.0 - doc['distance']  # Convert distance to similarity
+                relevance_sum += relevance
+                add_source({
+                    "upload_id": doc['metadata'].get('upload_id', 'unknown'),
+                    "chunk_index": doc['metadata'].get('chunk_index', 0),
+                    "relevance_score": relevance
+                })
+        
+        # Confidence is the average source relevance
+        avg_relevance = relevance_sum / len(sources) if sources else 0.0
+        
+        context = "\n\n".join(context_parts)
+        
+        user_prompt = f"""Context:
+{context}
+
+Question: {question}
+
+Please provide a helpful answer based on the context above."""
+        
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+        return messages, sources, avg_relevance
+    
+    @staticmethod
+    def _error_answer(error: Exception) -> Dict[str, Any]:
+        """Build the answer returned when the RAG pipeline fails."""
+        return {
+            "answer": "I encountered an error while processing your question. Please try again.",
+            "sources": [],
+            "confidence": 0.0,
+            "error": str(error)
+        }
     
     def _split_text_into_chunks(self, text: str) -> List[str]:
-        """Split text into overlapping chunks."""
-        # Clean text
-        text = re.sub(r'\s+', ' ', text.strip())
+        """Split text into overlapping chunks, without duplicates."""
+        # Clean text: collapse whitespace runs to single spaces
+        text = ' '.join(text.split())
         
         if len(text) <= self.max_chunk_size:
             return [text]
@@ -116,15 +229,10 @@ Please provide a helpful answer based on the context above."""
                 chunks.append(text[start:])
                 break
             
-            # Try to break at sentence boundary
-            last_period = text.rfind('.', start, end)
-            last_exclamation = text.rfind('!', start, end)
-            last_question = text.rfind('?', start, end)
-            
-            last_sentence_end = max(last_period, last_exclamation, last_question)
-            
-            if last_sentence_end > start + self.max_chunk_size // 2:
-                end = last_sentence_end + 1
+            # Try to break at the last sentence boundary in the second half of the window
+            sentence_end = _LAST_SENTENCE_END_RE.search(text, start + self.max_chunk_size // 2 + 1, end)
+            if sentence_end:
+                end = sentence_end.start() + 1
             
             chunks.append(text[start:end].strip())
             start = end - self.chunk_overlap
@@ -132,23 +240,18 @@ Please provide a helpful answer based on the context above."""
             if start < 0:
                 start = end
         
-        return [chunk for chunk in chunks if chunk.strip()]
+        # Drop empty and repeated chunks (e.g. boilerplate), keeping first occurrences in order
+        return list(dict.fromkeys(chunk for chunk in chunks if chunk.strip()))
     
     def get_document_stats(self) -> Dict[str, Any]:
         """Get statistics about stored documents."""
         collection_info = self.vector_db.get_collection_info()
         
-        # Get all documents to analyze
+        # Only metadata is needed; skip loading document text and embeddings
         try:
-            all_docs = self.vector_db.collection.get()
-            upload_ids = set()
-            total_chunks = 0
-            
-            if all_docs['metadatas']:
-                for metadata in all_docs['metadatas']:
-                    if metadata and 'upload_id' in metadata:
-                        upload_ids.add(metadata['upload_id'])
-                    total_chunks += 1
+            metadatas = self.vector_db.collection.get(include=['metadatas'])['metadatas'] or []
+            upload_ids = {m['upload_id'] for m in metadatas if m and 'upload_id' in m}
+            total_chunks = len(metadatas)
             
             return {
                 "total_documents": len(upload_ids),
@@ -0,0 +1,73 @@
+"""Answer cache placed in front of the RAG pipeline."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.vector_db import get_vector_db
+
+logger = get_logger(__name__)
+
+CacheKey = Tuple[str, int, float]
+
+
+class SemanticCache:
+    """LRU cache of chat answers keyed by exact question text.
+
+    The hash-based embeddings used by the vector database carry no semantic
+    signal: two questions only share an embedding when their raw text is
+    equal, so only an identical question is guaranteed the same retrieved
+    context. Keying on the exact text keeps cached answers consistent with
+    the uncached path, without LSH bucketing. Entries expire after a TTL
+    and whenever the vector database is written to.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def _make_key(query: str, context_limit: int, temperature: float) -> CacheKey:
+        """Build the cache key for a question and its generation parameters."""
+        return (query, context_limit, temperature)
+
+    def get(self, query: str, context_limit: int, temperature: float) -> Optional[Dict[str, Any]]:
+        """Return a cached answer, or None on a miss."""
+        key = self._make_key(query, context_limit, temperature)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, revision, result = entry
+        if revision != get_vector_db().revision or time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, query: str, context_limit: int, temperature: float, result: Dict[str, Any]) -> None:
+        """Cache a successful answer."""
+        if self.max_size <= 0 or "error" in result:
+            return
+
+        key = self._make_key(query, context_limit, temperature)
+        self._entries[key] = (time.monotonic(), get_vector_db().revision, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        self._entries.clear()
+        logger.info("Cleared chat answer cache")
+
+
+# Global answer cache instance
+semantic_cache = SemanticCache(
+    max_size=settings.chat_cache_size,
+    ttl_seconds=settings.chat_cache_ttl_seconds,
+)
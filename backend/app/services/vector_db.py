@@ -1,44 +1,181 @@
 """Vector database service for RAG chatbot."""
 
-import uuid
+import hashlib
+import threading
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings
 # from sentence_transformers import SentenceTransformer  # Commented out for memory optimization
-# import numpy as np  # Commented out for memory optimization
 
 from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Max documents per collection.add call
+ADD_BATCH_SIZE = 512
+
+# Float bits of every byte value, built once so embedding only allocates its result
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little").astype(np.float32)
+
+# Number of set bits in every byte value
+_POPCOUNT = _BYTE_BITS.sum(axis=1).astype(np.uint8)
+
+
+def _hash_digests(texts: List[str]) -> bytes:
+    """Return the concatenated 4-byte hash digest of every text.
+    
+    A blake2b digest keeps embeddings stable across restarts, unlike the
+    per-process salted built-in hash().
+    """
+    return b"".join(hashlib.blake2b(text.encode("utf-8"), digest_size=4).digest() for text in texts)
+
+
+def _hash_embeddings(digests: bytes) -> List[List[float]]:
+    """Expand hash digests into simple 32-dim embeddings (not semantic, but memory-efficient)."""
+    # One table lookup per digest byte yields its 8 float bits, least significant first
+    return _BYTE_BITS[np.frombuffer(digests, dtype=np.uint8)].reshape(-1, 32).tolist()
+
+
+def _content_id(document: str, metadata: Dict[str, Any]) -> str:
+    """Return a stable ID for a document from its source and text."""
+    source = str(metadata.get("url") or metadata.get("source", ""))
+    return hashlib.blake2b(f"{source}\0{document}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _query_digest(query: str) -> bytes:
+    """Return the hash digest of a search query.
+    
+    The raw text is hashed, exactly as documents are, so a query equal to a
+    stored chunk still lands at distance 0.
+    """
+    return _hash_digests([query])
+
+
+def _digest_codes(digests: bytes) -> np.ndarray:
+    """View hash digests as one packed uint32 code per text."""
+    return np.frombuffer(digests, dtype="<u4")
+
+
+class _HammingIndex:
+    """In-memory index of the hash embeddings, one packed uint32 code per document.
+    
+    The embeddings are 0/1 vectors, so the squared L2 distance ChromaDB ranks
+    by equals the Hamming distance between codes. An XOR + popcount scan over
+    every code therefore finds the same nearest neighbours as a collection query.
+    """
+    
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Codes live in the head of a buffer grown by doubling, so adds are amortized O(1)
+        self._buffer = np.empty(0, dtype="<u4")
+        # Replaced as a whole, so searches read a consistent snapshot without locking.
+        # Adds only append past the snapshot's end, which readers never look at.
+        self._entries: Tuple[List[str], np.ndarray] = ([], self._buffer)
+    
+    def __len__(self) -> int:
+        return len(self._entries[1])
+    
+    def add(self, ids: List[str], codes: np.ndarray) -> None:
+        """Index documents by their codes."""
+        with self._lock:
+            old_ids, old_codes = self._entries
+            start = len(old_codes)
+            end = start + len(codes)
+            if end > len(self._buffer):
+                buffer = np.empty(max(end, 2 * len(self._buffer)), dtype="<u4")
+                buffer[:start] = old_codes
+                self._buffer = buffer
+            self._buffer[start:end] = codes
+            old_ids.extend(ids)
+            self._entries = (old_ids, self._buffer[:end])
+    
+    def remove(self, ids: List[str]) -> None:
+        """Drop documents from the index."""
+        drop = set(ids)
+        with self._lock:
+            old_ids, old_codes = self._entries
+            keep = [i for i, doc_id in enumerate(old_ids) if doc_id not in drop]
+            self._buffer = old_codes[keep]
+            self._entries = ([old_ids[i] for i in keep], self._buffer)
+    
+    def clear(self) -> None:
+        """Drop every document from the index."""
+        with self._lock:
+            self._buffer = np.empty(0, dtype="<u4")
+            self._entries = ([], self._buffer)
+    
+    def search(self, query_codes: np.ndarray, n_results: int) -> Tuple[List[List[str]], List[List[float]]]:
+        """Return the ids and distances of the nearest documents for each query code."""
+        ids, codes = self._entries
+        n_results = min(n_results, len(codes))
+        if n_results <= 0:
+            return [[] for _ in query_codes], [[] for _ in query_codes]
+        
+        # Hamming distance of every (query, document) pair: popcount of the XOR, byte by byte
+        xor_bytes = (query_codes[:, None] ^ codes[None, :]).view(np.uint8)
+        distances = _POPCOUNT[xor_bytes].reshape(len(query_codes), len(codes), 4).sum(axis=2, dtype=np.uint8)
+        
+        # Select the top n_results in linear time, then sort only those. Ties break
+        # by insertion order: the position is packed below the distance in one key
+        keys = (distances.astype(np.uint64) << np.uint64(32)) | np.arange(len(codes), dtype=np.uint64)
+        top = np.argpartition(keys, n_results - 1, axis=1)[:, :n_results]
+        top = np.take_along_axis(top, np.take_along_axis(keys, top, axis=1).argsort(axis=1), axis=1)
+        return (
+            [[ids[i] for i in row] for row in top],
+            [distances[q, row].astype(float).tolist() for q, row in enumerate(top)],
+        )
+
+
+@lru_cache(maxsize=1)
+def _chroma_client() -> "chromadb.API":
+    """Return the process-wide persistent ChromaDB client."""
+    db_path = settings.vector_db_path or (settings.local_bucket_dir + "/chroma_db")
+    return chromadb.PersistentClient(
+        path=db_path,
+        settings=Settings(anonymized_telemetry=False)
+    )
+
 
 class VectorDB:
     """ChromaDB-based vector database for document storage and retrieval."""
     
     def __init__(self, collection_name: str = "documents"):
         self.collection_name = collection_name
+        # Bumped on every write so dependent caches can detect stale entries
+        self.revision = 0
         # Use simple hash-based embeddings to reduce memory usage
         self.embedding_model = None  # No external model needed
         
-        # Initialize ChromaDB
-        db_path = settings.vector_db_path or (settings.local_bucket_dir + "/chroma_db")
-        self.client = chromadb.PersistentClient(
-            path=db_path,
-            settings=Settings(anonymized_telemetry=False)
-        )
+        # Collections share one ChromaDB client
+        self.client = _chroma_client()
         
         # Get or create collection
-        try:
-            self.collection = self.client.get_collection(name=collection_name)
-            logger.info(f"Loaded existing collection: {collection_name}")
-        except Exception:
-            self.collection = self.client.create_collection(
-                name=collection_name,
-                metadata={"description": "RAG chatbot document collection"}
-            )
-            logger.info(f"Created new collection: {collection_name}")
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            metadata={"description": "RAG chatbot document collection"}
+        )
+        logger.info(f"Opened collection: {collection_name}")
+        
+        # Optionally serve unfiltered searches from memory instead of ChromaDB
+        self._index: Optional[_HammingIndex] = None
+        if settings.vector_index_in_memory:
+            self._index = self._load_index()
+    
+    def _load_index(self) -> _HammingIndex:
+        """Build the in-memory index from the embeddings already stored."""
+        index = _HammingIndex()
+        existing = self.collection.get(include=["embeddings"])
+        if existing["ids"]:
+            bits = np.asarray(existing["embeddings"], dtype=np.float32) > 0.5
+            codes = np.packbits(bits, axis=1, bitorder="little").view("<u4").ravel()
+            index.add(existing["ids"], codes)
+        logger.info(f"Loaded in-memory vector index with {len(index)} documents")
+        return index
     
     def add_documents(
         self, 
@@ -46,37 +183,64 @@ class VectorDB:
         metadatas: Optional[List[Dict[str, Any]]] = None,
         ids: Optional[List[str]] = None
     ) -> List[str]:
-        """Add documents to the vector database."""
+        """Add documents to the vector database.
+        
+        Without explicit IDs, documents get IDs hashed from their source URL
+        and text, and any document already stored is skipped, so re-ingesting
+        an unchanged page is cheap. Returns the IDs of the documents written.
+        """
         if not documents:
             return []
         
-        # Generate IDs if not provided
-        if ids is None:
-            ids = [str(uuid.uuid4()) for _ in documents]
-        
-        # Generate simple hash-based embeddings to reduce memory usage
-        embeddings = []
-        for doc in documents:
-            # Simple hash-based embedding (not semantic, but memory-efficient)
-            hash_val = hash(doc) % (2**31)
-            embedding = [float((hash_val >> i) & 1) for i in range(32)]  # 32-dim vector
-            embeddings.append(embedding)
-        
         # Prepare metadatas
         if metadatas is None:
             metadatas = [{"source": "upload"} for _ in documents]
         
-        # Add to collection
-        self.collection.add(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+        given = len(documents)
+        if ids is None:
+            ids = [_content_id(doc, metadata) for doc, metadata in zip(documents, metadatas)]
+            documents, metadatas, ids = self._skip_stored(documents, metadatas, ids)
+            if not documents:
+                logger.info(f"All {given} documents already in vector database")
+                return []
         
-        logger.info(f"Added {len(documents)} documents to vector database")
+        # Add to collection in bounded batches to cap memory and transaction size
+        for start in range(0, len(documents), ADD_BATCH_SIZE):
+            end = start + ADD_BATCH_SIZE
+            batch = documents[start:end]
+            digests = _hash_digests(batch)
+            self.collection.add(
+                documents=batch,
+                # Generate simple hash-based embeddings to reduce memory usage
+                embeddings=_hash_embeddings(digests),
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
+            if self._index is not None:
+                self._index.add(ids[start:end], _digest_codes(digests))
+            self.revision += 1
+        
+        logger.info(f"Added {len(documents)} documents to vector database ({given - len(documents)} already stored)")
         return ids
     
+    def _skip_stored(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
+        """Drop documents whose ID is already stored or repeated earlier in the batch."""
+        seen = set(self.collection.get(ids=ids, include=[])["ids"])
+        kept_documents, kept_metadatas, kept_ids = [], [], []
+        for document, metadata, doc_id in zip(documents, metadatas, ids):
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            kept_documents.append(document)
+            kept_metadatas.append(metadata)
+            kept_ids.append(doc_id)
+        return kept_documents, kept_metadatas, kept_ids
+    
     def search(
         self, 
         query: str, 
@@ -84,35 +248,83 @@ class VectorDB:
         where: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Search for similar documents."""
-        # Generate simple hash-based query embedding
-        hash_val = hash(query) % (2**31)
-        query_embedding = [float((hash_val >> i) & 1) for i in range(32)]  # 32-dim vector
-        
-        # Search collection
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where
-        )
+        return self.search_many([query], n_results=n_results, where=where)[0]
+    
+    def search_many(
+        self,
+        queries: List[str],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for similar documents for several queries in one collection query.
+        
+        Identical queries in the batch are embedded and searched only once.
+        Unfiltered searches use the in-memory index when it is enabled.
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        digests = b"".join(_query_digest(query) for query in unique_queries)
         
-        # Format results
-        formatted_results = []
-        if results['documents'] and results['documents'][0]:
-            for i, doc in enumerate(results['documents'][0]):
-                formatted_results.append({
-                    'document': doc,
-                    'metadata': results['metadatas'][0][i] if results['metadatas'] and results['metadatas'][0] else {},
-                    'distance': results['distances'][0][i] if results['distances'] and results['distances'][0] else 0.0,
-                    'id': results['ids'][0][i] if results['ids'] and results['ids'][0] else None
-                })
+        if self._index is not None and where is None:
+            ids, distances = self._index.search(_digest_codes(digests), n_results)
+            results = self._results_for_ids(ids, distances)
+        else:
+            # Search collection with simple hash-based query embeddings
+            results = self.collection.query(
+                query_embeddings=_hash_embeddings(digests),
+                n_results=n_results,
+                where=where
+            )
+        
+        # Format results, one list per unique query
+        results_by_query = {}
+        for q, query in enumerate(unique_queries):
+            formatted_results = []
+            if results['documents'] and results['documents'][q]:
+                for i, doc in enumerate(results['documents'][q]):
+                    formatted_results.append({
+                        'document': doc,
+                        'metadata': results['metadatas'][q][i] if results['metadatas'] and results['metadatas'][q] else {},
+                        'distance': results['distances'][q][i] if results['distances'] and results['distances'][q] else 0.0,
+                        'id': results['ids'][q][i] if results['ids'] and results['ids'][q] else None
+                    })
+            results_by_query[query] = formatted_results
+        
+        # Scatter back to the caller's order
+        all_results = [results_by_query[query] for query in queries]
+        
+        logger.info(f"Found {sum(len(r) for r in all_results)} similar documents for {len(queries)} queries ({len(unique_queries)} unique)")
+        return all_results
+    
+    def _results_for_ids(
+        self,
+        ids: List[List[str]],
+        distances: List[List[float]]
+    ) -> Dict[str, List[List[Any]]]:
+        """Fetch documents for index hits, shaped like a collection query result."""
+        wanted = list(dict.fromkeys(doc_id for row in ids for doc_id in row))
+        found = self.collection.get(ids=wanted, include=["documents", "metadatas"]) if wanted else {"ids": []}
+        by_id = {
+            doc_id: (document, metadata)
+            for doc_id, document, metadata in zip(found["ids"], found.get("documents") or [], found.get("metadatas") or [])
+        }
         
-        logger.info(f"Found {len(formatted_results)} similar documents for query")
-        return formatted_results
+        results: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for id_row, distance_row in zip(ids, distances):
+            # Skip hits deleted since the index was read
+            hits = [(doc_id, distance) for doc_id, distance in zip(id_row, distance_row) if doc_id in by_id]
+            results["ids"].append([doc_id for doc_id, _ in hits])
+            results["documents"].append([by_id[doc_id][0] for doc_id, _ in hits])
+            results["metadatas"].append([by_id[doc_id][1] for doc_id, _ in hits])
+            results["distances"].append([distance for _, distance in hits])
+        return results
     
     def delete_documents(self, ids: List[str]) -> bool:
         """Delete documents by IDs."""
         try:
             self.collection.delete(ids=ids)
+            if self._index is not None:
+                self._index.remove(ids)
+            self.revision += 1
             logger.info(f"Deleted {len(ids)} documents from vector database")
             return True
         except Exception as e:
@@ -135,6 +347,9 @@ class VectorDB:
             all_docs = self.collection.get()
             if all_docs['ids']:
                 self.collection.delete(ids=all_docs['ids'])
+                if self._index is not None:
+                    self._index.clear()
+                self.revision += 1
                 logger.info("Cleared all documents from vector database")
             return True
         except Exception as e:
@@ -142,5 +357,7 @@ class VectorDB:
             return False
 
 
-# Global vector database instance
-vector_db = VectorDB()
+@lru_cache(maxsize=1)
+def get_vector_db() -> VectorDB:
+    """Return the global vector database instance, opening it on first use."""
+    return VectorDB()
@@ -1,8 +1,13 @@
 """Website ingestion service for RAG chatbot."""
 
+import asyncio
 import time
-from typing import Any, Dict, List, Optional
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Union
 
+from pydantic import HttpUrl
+
+from app.core.config import settings
 from app.core.logging import get_logger
 from app.services.rag_service import rag_service
 from app.services.web_scraper import web_scraper
@@ -27,8 +32,8 @@ class WebsiteIngestionService:
         try:
             logger.info(f"Starting website ingestion: {url}")
             
-            # Scrape website content
-            scraped_pages = self.web_scraper.scrape_website(url, max_pages)
+            # Scrape website content off the event loop
+            scraped_pages = await asyncio.to_thread(self.web_scraper.scrape_website, url, max_pages)
             
             if not scraped_pages:
                 return {
@@ -38,9 +43,10 @@ class WebsiteIngestionService:
                     "pages_processed": 0
                 }
             
-            # Process and add content to RAG system
+            # Process content from every page, then add it to the RAG system in one batch
             successful_pages = [page for page in scraped_pages if page["success"]]
-            total_chunks = 0
+            all_chunks: List[str] = []
+            all_metadatas: List[Dict[str, Any]] = []
             
             for page in successful_pages:
                 if page["content"]:
@@ -53,27 +59,27 @@ class WebsiteIngestionService:
                     )
                     
                     if chunks:
-                        # Add chunks to vector database
-                        metadatas = []
-                        for i, chunk in enumerate(chunks):
-                            metadatas.append({
-                                "source": "website",
-                                "url": page["url"],
-                                "title": page["title"],
-                                "chunk_index": i,
-                                "total_chunks": len(chunks),
-                                "domain": page["metadata"].get("domain", ""),
-                                "scraped_at": page["metadata"].get("scraped_at", time.time())
-                            })
-                        
-                        # Add to vector database
-                        chunk_ids = self.rag_service.vector_db.add_documents(
-                            documents=chunks,
-                            metadatas=metadatas
-                        )
-                        
-                        total_chunks += len(chunks)
-                        logger.info(f"Added {len(chunks)} chunks from {page['url']}")
+                        page_metadata = {
+                            "source": "website",
+                            "url": page["url"],
+                            "title": page["title"],
+                            "total_chunks": len(chunks),
+                            "domain": page["metadata"].get("domain", ""),
+                            "scraped_at": page["metadata"].get("scraped_at", time.time())
+                        }
+                        all_chunks.extend(chunks)
+                        all_metadatas.extend({**page_metadata, "chunk_index": i} for i in range(len(chunks)))
+                        logger.info(f"Prepared {len(chunks)} chunks from {page['url']}")
+            
+            total_chunks = 0
+            if all_chunks:
+                # Add to vector database off the event loop; chunks already stored are skipped
+                chunk_ids = await asyncio.to_thread(
+                    self.rag_service.vector_db.add_documents,
+                    documents=all_chunks,
+                    metadatas=all_metadatas
+                )
+                total_chunks = len(chunk_ids)
             
             logger.info(f"Website ingestion complete: {url}, {len(successful_pages)} pages, {total_chunks} chunks")
             
@@ -97,16 +103,37 @@ class WebsiteIngestionService:
     
     async def ingest_multiple_websites(
         self, 
-        urls: List[str], 
+        urls: Sequence[Union[str, HttpUrl]], 
         max_pages_per_site: int = 10
     ) -> Dict[str, Any]:
-        """Ingest content from multiple websites."""
+        """Ingest content from multiple websites concurrently.
+        
+        URLs may be passed as validated HttpUrl objects; each worker
+        converts its own URL to a string when it starts.
+        """
+        semaphore = asyncio.Semaphore(settings.website_ingest_concurrency)
+        
+        async def ingest_one(url: Union[str, HttpUrl]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.ingest_website(str(url), max_pages_per_site)
+        
+        outcomes = await asyncio.gather(*(ingest_one(url) for url in urls), return_exceptions=True)
+        
         results = []
         total_chunks = 0
         total_pages = 0
         
-        for url in urls:
-            result = await self.ingest_website(url, max_pages_per_site)
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Website ingestion failed for {url}: {outcome}")
+                result = {
+                    "success": False,
+                    "error": str(outcome),
+                    "url": str(url),
+                    "pages_processed": 0
+                }
+            else:
+                result = outcome
             results.append(result)
             
             if result["success"]:
@@ -150,33 +177,34 @@ class WebsiteIngestionService:
     def get_website_sources(self) -> List[Dict[str, Any]]:
         """Get information about website sources in the vector database."""
         try:
-            # Get all documents from the vector database
-            all_docs = self.rag_service.vector_db.collection.get()
+            # Let Chroma filter to website chunks and return only their metadata
+            website_docs = self.rag_service.vector_db.collection.get(
+                where={"source": "website"},
+                include=["metadatas"]
+            )
             
-            if not all_docs['metadatas']:
+            if not website_docs['metadatas']:
                 return []
             
-            # Group by website source
-            website_sources = {}
+            # Count chunks per URL; the first chunk seen for a URL describes it
+            metadatas = website_docs['metadatas']
+            chunk_counts = Counter(metadata.get('url', 'Unknown') for metadata in metadatas)
+            first_seen: Dict[str, Dict[str, Any]] = {}
+            for metadata in metadatas:
+                first_seen.setdefault(metadata.get('url', 'Unknown'), metadata)
             
-            for i, metadata in enumerate(all_docs['metadatas']):
-                if metadata and metadata.get('source') == 'website':
-                    url = metadata.get('url', 'Unknown')
-                    domain = metadata.get('domain', 'Unknown')
-                    
-                    if url not in website_sources:
-                        website_sources[url] = {
-                            "url": url,
-                            "domain": domain,
-                            "title": metadata.get('title', 'Unknown'),
-                            "chunks": 0,
-                            "scraped_at": metadata.get('scraped_at', 0)
-                        }
-                    
-                    website_sources[url]["chunks"] += 1
+            sources = [
+                {
+                    "url": url,
+                    "domain": metadata.get('domain', 'Unknown'),
+                    "title": metadata.get('title', 'Unknown'),
+                    "chunks": chunk_counts[url],
+                    "scraped_at": metadata.get('scraped_at', 0)
+                }
+                for url, metadata in first_seen.items()
+            ]
             
-            # Convert to list and sort by scraped_at
-            sources = list(website_sources.values())
+            # Sort by scraped_at
             sources.sort(key=lambda x: x["scraped_at"], reverse=True)
             
             return sources
@@ -188,17 +216,12 @@ class WebsiteIngestionService:
     def clear_website_sources(self) -> bool:
         """Clear all website sources from the vector database."""
         try:
-            # Get all documents
-            all_docs = self.rag_service.vector_db.collection.get()
-            
-            if not all_docs['ids']:
-                return True
-            
-            # Find IDs of website sources
-            website_ids = []
-            for i, metadata in enumerate(all_docs['metadatas']):
-                if metadata and metadata.get('source') == 'website':
-                    website_ids.append(all_docs['ids'][i])
+            # Find IDs of website sources with a server-side filter; deleting
+            # through the vector DB keeps its in-memory index in sync
+            website_ids = self.rag_service.vector_db.collection.get(
+                where={"source": "website"},
+                include=[]
+            )['ids']
             
             if website_ids:
                 # Delete website sources